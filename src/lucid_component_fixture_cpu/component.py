@@ -10,16 +10,30 @@ from __future__ import annotations
 
 import json
 import threading
-from datetime import datetime, timezone
+import time
+from queue import Empty, SimpleQueue
 from typing import Optional
 
 import psutil
 
 from lucid_component_base import Component, ComponentContext
 
+try:
+    import orjson as _orjson
+
+    _loads = _orjson.loads
+except ImportError:  # optional speedup; stdlib json accepts the same str/bytes input
+    _loads = json.loads
+
+# Resolved once at import; getloadavg is missing on some platforms
+_GETLOADAVG = getattr(psutil, "getloadavg", None)
+
 
 def _utc_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    # ISO-8601 UTC, always with 6-digit microseconds (rounded, carried into the seconds)
+    # and a +00:00 offset, without datetime objects
+    s, us = divmod(round(time.time() * 1e6), 1_000_000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(s))}.{us:06d}+00:00"
 
 
 class FixtureCpuComponent(Component):
@@ -32,12 +46,30 @@ class FixtureCpuComponent(Component):
     """
 
     _PUBLISH_INTERVAL_SECONDS = 2.0
+    # Consecutive idle cycles each add one interval to the wait (2 s up to 10 s)
+    _MAX_IDLE_STREAK = 4
+    # Minimum interval between psutil reads; calls within it reuse the last state
+    _STATE_CACHE_SECONDS = 0.5
+    # Blocking cpu_percent window taken once at start, before the loop's non-blocking reads
+    _START_SAMPLE_SECONDS = 0.1
+    # Keys of get_state_payload() and their telemetry streams, in publish order
+    _TELEMETRY_METRICS: tuple[str, ...] = ("cpu_percent", "load")
+    # Same names as a set; fixed, so cfg validation needs no psutil read
+    _STATE_METRICS: frozenset[str] = frozenset(_TELEMETRY_METRICS)
+    # Fields every per-metric telemetry cfg carries after cfg/telemetry/set
+    _METRIC_DEFAULTS = {"enabled": False, "interval_s": 2, "change_threshold_percent": 2.0}
+    # Per-metric telemetry cfg applied on every start
+    _START_METRIC_CFG = _METRIC_DEFAULTS | {"enabled": True}
 
     def __init__(self, context: ComponentContext) -> None:
         super().__init__(context)
         self._log = self.context.logger()
-        self._stop_event = threading.Event()
+        # Single writer (_stop) / single reader (_run_loop); a sentinel put means stop
+        self._stop_q: SimpleQueue[object] = SimpleQueue()
         self._thread: Optional[threading.Thread] = None
+        self._last_state: Optional[dict] = None
+        self._last_state_ts = 0.0
+        self._last_published_state: dict = {}
 
     @property
     def component_id(self) -> str:
@@ -52,20 +84,37 @@ class FixtureCpuComponent(Component):
         return out
 
     def get_state_payload(self) -> dict:
+        if self._last_state is None:
+            # Nothing read yet (not started): a blocking sample is valid on any thread
+            return self._read_state(cpu_interval=self._START_SAMPLE_SECONDS)
+        # The non-blocking cpu_percent baseline is per thread, so only the loop thread reads
+        # live; command/callback threads get the last loop or start reading unchanged
+        fresh = time.monotonic() - self._last_state_ts < self._STATE_CACHE_SECONDS
+        if fresh or threading.current_thread() is not self._thread:
+            return dict(self._last_state)
+        return self._read_state()
+
+    def _read_state(self, cpu_interval: Optional[float] = None) -> dict:
+        """Read psutil into the state cache. cpu_interval=None is the non-blocking delta read."""
         try:
-            # Use interval=0.1 to ensure we get a fresh measurement, not cached/zero
-            cpu = float(psutil.cpu_percent(interval=0.1))
+            # Non-blocking by default: psutil diffs against this thread's previous call
+            cpu = float(psutil.cpu_percent(interval=cpu_interval))
         except Exception:
             cpu = 0.0
         try:
-            load = float(psutil.getloadavg()[0]) if hasattr(psutil, "getloadavg") else 0.0
+            load = float(_GETLOADAVG()[0]) if _GETLOADAVG else 0.0
         except Exception:
             load = 0.0
-        return {"cpu_percent": cpu, "load": load}
+        self._last_state = {"cpu_percent": cpu, "load": load}
+        self._last_state_ts = time.monotonic()
+        return dict(self._last_state)
 
     def _start(self) -> None:
+        # One real (blocking) sample for the retained state; publish_state()/publish_cfg()
+        # reuse it from the cache. It does not prime the loop: see _run_loop.
+        self._last_published_state = self._read_state(cpu_interval=self._START_SAMPLE_SECONDS)
         self._publish_all_retained()
-        self._stop_event.clear()
+        self._stop_q = SimpleQueue()
         self._thread = threading.Thread(
             target=self._run_loop,
             name="LucidFixtureCpuLoop",
@@ -77,7 +126,7 @@ class FixtureCpuComponent(Component):
     def _stop(self) -> None:
         t = self._thread
         if t:
-            self._stop_event.set()
+            self._stop_q.put(None)
             t.join(timeout=2.0)
             if t.is_alive():
                 self._log.warning("CPU loop thread did not stop within timeout")
@@ -90,52 +139,105 @@ class FixtureCpuComponent(Component):
         self.publish_state()
         # Set and publish unified cfg with telemetry nested
         # Metrics are derived from state, so we enable the ones we want with per-metric configs
-        telemetry_cfg = {
-            "cpu_percent": {
-                "enabled": True,
-                "interval_s": 2,
-                "change_threshold_percent": 2.0,
-            },
-            "load": {
-                "enabled": True,
-                "interval_s": 2,
-                "change_threshold_percent": 2.0,
-            },
-        }
-        self.set_telemetry_config(telemetry_cfg)
+        # Copy per metric so later cfg/telemetry/set merges never touch the class default
+        self.set_telemetry_config({name: dict(self._START_METRIC_CFG) for name in self._TELEMETRY_METRICS})
         # publish_cfg() will automatically include all state metrics, merging with current config
         self.publish_cfg()
 
     def _run_loop(self) -> None:
-        while not self._stop_event.is_set():
+        # Schedule off a monotonic deadline so work time does not stretch the cadence.
+        # The first read waits one interval: _start already published a real sample.
+        next_deadline = time.monotonic() + self._PUBLISH_INTERVAL_SECONDS
+        # Bound once so a restart's fresh queue never reaches a lingering old thread
+        stop_q = self._stop_q
+        idle_streak = 0
+        # psutil keeps the non-blocking cpu_percent baseline per thread (>= 5.9.6) and the
+        # start sample ran on the caller's thread, so prime this thread before the first wait
+        try:
+            psutil.cpu_percent(interval=None)
+        except Exception:
+            pass
+        while True:
+            delay = max(0.0, next_deadline - time.monotonic())
             try:
-                state = self.get_state_payload()
-                self.publish_state(state)
-                cpu = state.get("cpu_percent", 0.0)
-                load = state.get("load", 0.0)
-                if self.should_publish_telemetry("cpu_percent", cpu):
-                    self.publish_telemetry("cpu_percent", cpu)
-                if self.should_publish_telemetry("load", load):
-                    self.publish_telemetry("load", load)
-            except Exception:
-                self._log.exception("Failed to publish fixture CPU telemetry")
-
-            if self._stop_event.wait(self._PUBLISH_INTERVAL_SECONDS):
+                stop_q.get(timeout=delay)
                 break
-
-    def on_cmd_reset(self, payload_str: str) -> None:
+            except Empty:
+                pass
+            published = self._publish_cycle()
+            # Back off while nothing changes; a publishing cycle returns to the base cadence
+            idle_streak = 0 if published else min(idle_streak + 1, self._MAX_IDLE_STREAK)
+            interval = self._PUBLISH_INTERVAL_SECONDS * (1 + idle_streak)
+            next_deadline += interval
+            now = time.monotonic()
+            if next_deadline <= now:
+                # Overran: resync a full interval out rather than running back-to-back
+                next_deadline = now + interval
+
+    def _publish_cycle(self) -> bool:
+        """Read state once and publish what changed. Returns True if anything was published."""
+        published = False
+        try:
+            state = self.get_state_payload()
+            # Retained state is only rewritten when a metric moved past its threshold
+            if self._state_changed(state, self._last_published_state):
+                self.publish_state(state)
+                self._last_published_state = state
+                published = True
+            for name in self._TELEMETRY_METRICS:
+                value = state.get(name, 0.0)
+                if self.should_publish_telemetry(name, value):
+                    self.publish_telemetry(name, value)
+                    published = True
+        except Exception:
+            self._log.exception("Failed to publish fixture CPU telemetry")
+        return published
+
+    @classmethod
+    def _normalize_metric_cfg(cls, raw: object, existing: object = None) -> Optional[dict]:
+        """Merge a requested metric cfg as defaults < existing < raw; None if raw is not an object or boolean."""
+        if isinstance(raw, bool):
+            raw = {"enabled": raw}
+        elif not isinstance(raw, dict):
+            return None
+        if isinstance(existing, dict):
+            return cls._METRIC_DEFAULTS | existing | raw
+        return cls._METRIC_DEFAULTS | raw
+
+    def _state_changed(self, state: dict, previous: dict) -> bool:
+        """True if any metric moved by at least its change_threshold_percent."""
+        for name, value in state.items():
+            if name not in previous:
+                return True
+            last = previous[name]
+            metric_cfg = self._telemetry_cfg.get(name)
+            threshold = self._METRIC_DEFAULTS["change_threshold_percent"]
+            if isinstance(metric_cfg, dict):
+                try:
+                    threshold = float(metric_cfg.get("change_threshold_percent", threshold))
+                except (TypeError, ValueError):
+                    # cfg/telemetry/set does not validate fields; keep the default, don't fail the cycle
+                    pass
+            if last == 0:
+                if value != 0:
+                    return True
+            elif abs(value - last) / abs(last) * 100.0 >= threshold:
+                return True
+        return False
+
+    def on_cmd_reset(self, payload_str: str | bytes) -> None:
         """Handle cmd/reset: parse request_id, publish evt/reset/result."""
         try:
-            payload = json.loads(payload_str) if payload_str else {}
+            payload = _loads(payload_str) if payload_str else {}
             request_id = payload.get("request_id", "")
         except json.JSONDecodeError:
             request_id = ""
         self.publish_result("reset", request_id, ok=True, error=None)
 
-    def on_cmd_ping(self, payload_str: str) -> None:
+    def on_cmd_ping(self, payload_str: str | bytes) -> None:
         """Handle cmd/ping → evt/ping/result."""
         try:
-            payload = json.loads(payload_str) if payload_str else {}
+            payload = _loads(payload_str) if payload_str else {}
             request_id = payload.get("request_id", "")
         except json.JSONDecodeError:
             request_id = ""
@@ -195,9 +297,7 @@ class FixtureCpuComponent(Component):
             return
 
         try:
-            # Get available metrics from state to validate
-            state_payload = self.get_state_payload()
-            available_metrics = set(state_payload.keys()) if isinstance(state_payload, dict) else set()
+            available_metrics = self._STATE_METRICS
 
             # Get current telemetry config
             current_metrics = dict(self._telemetry_cfg)
@@ -208,15 +308,8 @@ class FixtureCpuComponent(Component):
                     self._log.warning("Ignoring metric not in state: %s", metric_name)
                     continue
 
-                # Merge metric config
-                if metric_name in current_metrics and isinstance(current_metrics[metric_name], dict):
-                    existing = current_metrics[metric_name]
-                else:
-                    existing = {}
-
-                if isinstance(metric_cfg, bool):
-                    metric_cfg = {"enabled": metric_cfg}
-                if not isinstance(metric_cfg, dict):
+                merged = self._normalize_metric_cfg(metric_cfg, current_metrics.get(metric_name))
+                if merged is None:
                     self.publish_cfg_set_result(
                         request_id=request_id,
                         ok=False,
@@ -226,27 +319,12 @@ class FixtureCpuComponent(Component):
                         action="cfg/telemetry/set",
                     )
                     return
-
-                current_metrics[metric_name] = {
-                    **existing,
-                    **metric_cfg,
-                }
-
-                if "enabled" not in current_metrics[metric_name]:
-                    current_metrics[metric_name]["enabled"] = False
-                if "interval_s" not in current_metrics[metric_name]:
-                    current_metrics[metric_name]["interval_s"] = 2
-                if "change_threshold_percent" not in current_metrics[metric_name]:
-                    current_metrics[metric_name]["change_threshold_percent"] = 2.0
+                current_metrics[metric_name] = merged
 
             # Ensure all state metrics are present (add missing ones with defaults)
             for metric_name in available_metrics:
                 if metric_name not in current_metrics:
-                    current_metrics[metric_name] = {
-                        "enabled": False,
-                        "interval_s": 2,
-                        "change_threshold_percent": 2.0,
-                    }
+                    current_metrics[metric_name] = dict(self._METRIC_DEFAULTS)
 
             self.set_telemetry_config(current_metrics)
             self.publish_cfg_telemetry()
@@ -1,5 +1,16 @@
 from __future__ import annotations
 
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from queue import Empty
+from types import SimpleNamespace
+
+import pytest
+
+from lucid_component_fixture_cpu import component as component_mod
 from lucid_component_fixture_cpu.component import FixtureCpuComponent
 
 
@@ -19,14 +30,227 @@ class DummyCtx:
             mqtt=DummyMQTT(),
             config={},
         )
+        # Bind hot attributes directly; __getattr__ only covers the rest
+        self.logger = self._ctx.logger
+        self.mqtt = self._ctx.mqtt
 
     def __getattr__(self, name):
         return getattr(self._ctx, name)
 
 
+class FakeStopQueue:
+    """Stands in for the loop's stop queue: records each wait and advances a fake clock."""
+
+    def __init__(self, clock: SimpleNamespace, waits_before_stop: int):
+        self.clock = clock
+        self.waits_before_stop = waits_before_stop
+        self.waits: list[float] = []
+
+    def get(self, timeout: float | None = None):
+        self.waits.append(timeout)
+        self.clock.now += timeout
+        if len(self.waits) >= self.waits_before_stop:
+            return None
+        raise Empty
+
+
+def run_loop(monkeypatch, results: list[bool], work_s: float = 0.0) -> list[float]:
+    """Run _run_loop with scripted _publish_cycle results; return the waits it made."""
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(component_mod, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    c = FixtureCpuComponent(DummyCtx())  # type: ignore[arg-type]
+    scripted = iter(results)
+
+    def publish_cycle() -> bool:
+        clock.now += work_s
+        return next(scripted)
+
+    c._publish_cycle = publish_cycle  # type: ignore[method-assign]
+    # One wait before each scripted cycle, then the stop
+    c._stop_q = FakeStopQueue(clock, len(results) + 1)  # type: ignore[assignment]
+    c._run_loop()
+    return c._stop_q.waits
+
+
 def test_start_stop_idempotent():
     c = FixtureCpuComponent(DummyCtx())  # type: ignore[arg-type]
     c.start()
     c.start()
     c.stop()
     c.stop()
+
+
+def test_normalize_metric_cfg_merges_over_defaults():
+    norm = FixtureCpuComponent._normalize_metric_cfg
+    assert norm(True) == {"enabled": True, "interval_s": 2, "change_threshold_percent": 2.0}
+    assert norm({"interval_s": 5}, {"enabled": True, "interval_s": 1}) == {
+        "enabled": True,
+        "interval_s": 5,
+        "change_threshold_percent": 2.0,
+    }
+    assert norm("yes") is None
+
+
+def test_run_loop_backs_off_when_idle_and_resets_on_publish(monkeypatch):
+    step = FixtureCpuComponent._PUBLISH_INTERVAL_SECONDS
+    waits = run_loop(monkeypatch, [False, False, False, False, False, True, False])
+    assert waits == pytest.approx([step, 2 * step, 3 * step, 4 * step, 5 * step, 5 * step, step, 2 * step])
+
+
+def test_start_publishes_a_real_cpu_sample(monkeypatch):
+    intervals = []
+
+    def cpu_percent(interval=None):
+        # The loop thread primes its own baseline once started; only count the caller's reads
+        if threading.current_thread() is threading.main_thread():
+            intervals.append(interval)
+        return 37.5
+
+    monkeypatch.setattr(component_mod.psutil, "cpu_percent", cpu_percent)
+    c = FixtureCpuComponent(DummyCtx())  # type: ignore[arg-type]
+    c.start()
+    try:
+        # The start read is a timed sample; retained publishes at start reuse it
+        assert intervals == [FixtureCpuComponent._START_SAMPLE_SECONDS]
+        assert c.get_state_payload()["cpu_percent"] == 37.5
+        assert intervals == [FixtureCpuComponent._START_SAMPLE_SECONDS]
+    finally:
+        c.stop()
+
+
+def test_run_loop_primes_cpu_baseline_on_its_own_thread(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(component_mod, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    events: list[tuple] = []
+
+    def cpu_percent(interval=None):
+        events.append(("cpu", threading.current_thread(), interval))
+        return 50.0
+
+    class RecordingStopQueue(FakeStopQueue):
+        def get(self, timeout=None):
+            events.append(("wait", threading.current_thread(), timeout))
+            return super().get(timeout)
+
+    monkeypatch.setattr(component_mod.psutil, "cpu_percent", cpu_percent)
+    c = FixtureCpuComponent(DummyCtx())  # type: ignore[arg-type]
+    c._read_state(cpu_interval=FixtureCpuComponent._START_SAMPLE_SECONDS)  # the start sample
+    c._stop_q = RecordingStopQueue(clock, 2)  # type: ignore[assignment]
+    loop = threading.Thread(target=c._run_loop)
+    c._thread = loop
+    loop.start()
+    loop.join(timeout=5.0)
+
+    on_loop = [(kind, arg) for kind, thread, arg in events if thread is loop]
+    # Priming read, first wait, then the first real read against that baseline
+    assert on_loop[:3] == [("cpu", None), ("wait", FixtureCpuComponent._PUBLISH_INTERVAL_SECONDS), ("cpu", None)]
+
+
+def test_run_loop_absorbs_work_time_and_resyncs_after_overrun(monkeypatch):
+    step = FixtureCpuComponent._PUBLISH_INTERVAL_SECONDS
+    assert run_loop(monkeypatch, [True, True], work_s=0.5) == pytest.approx([step, step - 0.5, step - 0.5])
+    assert run_loop(monkeypatch, [True, True], work_s=3 * step) == pytest.approx([step, step, step])
+
+
+def test_state_cache_reuses_reads_within_gate(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(component_mod, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    reads = []
+
+    def cpu_percent(interval=None):
+        reads.append(interval)
+        return 10.0 * len(reads)
+
+    monkeypatch.setattr(component_mod.psutil, "cpu_percent", cpu_percent)
+    monkeypatch.setattr(component_mod, "_GETLOADAVG", lambda: (1.5, 1.0, 0.5))
+    gate = FixtureCpuComponent._STATE_CACHE_SECONDS
+    start_sample = FixtureCpuComponent._START_SAMPLE_SECONDS
+    c = FixtureCpuComponent(DummyCtx())  # type: ignore[arg-type]
+
+    # Nothing cached yet: a blocking sample
+    first = c.get_state_payload()
+    assert first == {"cpu_percent": 10.0, "load": 1.5}
+    assert reads == [start_sample]
+    first["cpu_percent"] = -1.0
+
+    # Act as the loop thread from here on
+    c._thread = threading.current_thread()  # type: ignore[assignment]
+    clock.now += gate / 2
+    # Within the gate: no psutil call, and the caller's mutation did not leak into the cache
+    assert c.get_state_payload() == {"cpu_percent": 10.0, "load": 1.5}
+    assert reads == [start_sample]
+
+    clock.now += gate
+    assert c.get_state_payload()["cpu_percent"] == 20.0
+    assert reads == [start_sample, None]
+
+
+def test_state_cache_only_refreshed_by_loop_thread(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(component_mod, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    reads = []
+
+    def cpu_percent(interval=None):
+        reads.append(interval)
+        return 42.0
+
+    monkeypatch.setattr(component_mod.psutil, "cpu_percent", cpu_percent)
+    c = FixtureCpuComponent(DummyCtx())  # type: ignore[arg-type]
+    c._read_state(cpu_interval=FixtureCpuComponent._START_SAMPLE_SECONDS)
+    c._thread = threading.Thread(target=lambda: None)  # some other thread is the loop
+
+    # A stale cache is still served as-is to non-loop callers: they have no psutil baseline
+    clock.now += 10 * FixtureCpuComponent._STATE_CACHE_SECONDS
+    assert c.get_state_payload()["cpu_percent"] == 42.0
+    assert reads == [FixtureCpuComponent._START_SAMPLE_SECONDS]
+
+
+def test_utc_iso_round_trips_within_a_microsecond(monkeypatch):
+    rng = random.Random(0)
+    # Whole second, exact fraction, a fraction that rounds up into the next second, random
+    samples = [1700000000.0, 1700000000.25, 1700000000.9999996] + [rng.uniform(0, 2_000_000_000) for _ in range(1000)]
+    for ts in samples:
+        monkeypatch.setattr(
+            component_mod,
+            "time",
+            SimpleNamespace(time=lambda ts=ts: ts, strftime=time.strftime, gmtime=time.gmtime),
+        )
+        out = component_mod._utc_iso()
+        assert re.fullmatch(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{6}\+00:00", out), out
+        parsed = datetime.fromisoformat(out)
+        assert parsed.utcoffset() == timedelta(0)
+        assert abs(parsed.timestamp() - ts) < 1e-6
+
+
+
+def test_state_changed_uses_per_metric_thresholds():
+    c = FixtureCpuComponent(DummyCtx())  # type: ignore[arg-type]
+    c.set_telemetry_config({"cpu_percent": {"change_threshold_percent": 10.0}, "load": {}})
+    changed = c._state_changed
+
+    # Missing previous value always publishes
+    assert changed({"cpu_percent": 50.0, "load": 1.0}, {"load": 1.0})
+    # Zero baseline: any non-zero value is a change
+    assert not changed({"cpu_percent": 0.0, "load": 0.0}, {"cpu_percent": 0.0, "load": 0.0})
+    assert changed({"cpu_percent": 0.0, "load": 0.1}, {"cpu_percent": 0.0, "load": 0.0})
+    # load falls back to the default 2% threshold: below vs at
+    assert not changed({"cpu_percent": 100.0, "load": 1.01}, {"cpu_percent": 100.0, "load": 1.0})
+    assert changed({"cpu_percent": 100.0, "load": 1.02}, {"cpu_percent": 100.0, "load": 1.0})
+    # cpu_percent uses its configured 10% threshold
+    assert not changed({"cpu_percent": 105.0, "load": 1.0}, {"cpu_percent": 100.0, "load": 1.0})
+    assert changed({"cpu_percent": 110.0, "load": 1.0}, {"cpu_percent": 100.0, "load": 1.0})
+
+
+def test_state_changed_ignores_non_numeric_threshold():
+    c = FixtureCpuComponent(DummyCtx())  # type: ignore[arg-type]
+    c.set_telemetry_config({"cpu_percent": {"change_threshold_percent": "lots"}})
+    previous = {"cpu_percent": 100.0, "load": 1.0}
+    assert not c._state_changed({"cpu_percent": 101.0, "load": 1.0}, previous)
+    assert c._state_changed({"cpu_percent": 102.0, "load": 1.0}, previous)
+
+
+def test_metric_constants_match_state_payload():
+    c = FixtureCpuComponent(DummyCtx())  # type: ignore[arg-type]
+    # cfg validation and telemetry both key off these; they must not drift from the state
+    assert set(c.get_state_payload()) == FixtureCpuComponent._STATE_METRICS
+    assert set(FixtureCpuComponent._TELEMETRY_METRICS) == FixtureCpuComponent._STATE_METRICS